@@ -1,63 +1,277 @@
 # app.py - Flask Backend API (FIXED IMPORTS FOR RENDER)
-from flask import Flask, request, jsonify
+import os
+
+# One BLAS/OpenMP thread per process: gunicorn workers provide the
+# parallelism. Must be set before numpy is imported.
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+from flask import Flask, Response, request
 from flask_cors import CORS
-import pickle
+from functools import lru_cache
+import hashlib
+import threading
+import numpy as np
+import orjson
 import pandas as pd
-import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
 
 # FIXED: Import from root level, not from backend module
 from utils import (
+    EXPECTED_FEATURES,
+    N_FEATURES,
     validate_input,
-    prepare_features,
+    fill_features,
+    prepare_batch_features,
+    prepare_table_features,
     format_prediction_response
 )
+from batching import MicroBatcher
 
 app = Flask(__name__)
 CORS(app)
 
 # Load model and ranking data
-MODEL_PATH = 'models/final_model_scientific.pkl'
+ONNX_MODEL_PATH = 'models/model.onnx'
+MODEL_PATH = 'models/final_model_scientific.joblib'
 RANKING_PATH = 'data/processed/habitability_ranking_final.csv'
 
+# Only the columns /rank serves, with their final dtypes
+RANKING_DTYPES = {
+    'rank': 'int32',
+    'planet_name': 'string',
+    'habitability_probability': 'float64',
+    'predicted_habitable': 'bool',
+    'discovery_year': 'Int32'
+}
+
+# Micro-batching for concurrent /predict requests
+BATCH_MAX_SIZE = 64
+BATCH_WINDOW_SECONDS = 0.005
+PREDICT_TIMEOUT_SECONDS = 5.0
+
+# /batch_predict streams results as each chunk of planets is scored
+BATCH_STREAM_CHUNK = 25
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Client/CDN caching for responses over static data
+RANK_CACHE_SIZE = 512
+RANK_MAX_AGE_SECONDS = 3600
+STATIC_MAX_AGE_SECONDS = 86400  # / and /examples never change between deploys
+
+# Preferred: ONNX graph exported by backend/training/export_onnx.py
+session = None
+model = None
+
 try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    print(f"✅ Model loaded from {MODEL_PATH}")
+    import onnxruntime as ort
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.intra_op_num_threads = 1
+    session = ort.InferenceSession(ONNX_MODEL_PATH, sess_options=so, providers=['CPUExecutionProvider'])
+    input_type = session.get_inputs()[0].type
+    if input_type != 'tensor(float)':
+        raise ValueError(f"{ONNX_MODEL_PATH} expects {input_type}, the API feeds tensor(float) (float32)")
+    # A retrained model without a fresh export would silently serve stale predictions
+    source_sha = session.get_modelmeta().custom_metadata_map.get('source_sha256')
+    if os.path.exists(MODEL_PATH):
+        with open(MODEL_PATH, 'rb') as f:
+            if source_sha != hashlib.sha256(f.read()).hexdigest():
+                raise ValueError(f"{ONNX_MODEL_PATH} was not exported from the current "
+                                 f"{MODEL_PATH}; re-run backend/training/export_onnx.py")
+    print(f"✅ ONNX model loaded from {ONNX_MODEL_PATH}")
 except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
+    session = None
+    print(f"⚠️ ONNX model unavailable ({e}), falling back to {MODEL_PATH}")
+
+def drop_feature_names(estimator):
+    """Let the fitted calibrated pipeline take plain ndarrays in EXPECTED_FEATURES order"""
+    if list(estimator.feature_names_in_) != EXPECTED_FEATURES:
+        raise ValueError(f"{MODEL_PATH} was fit on a different feature order than utils.EXPECTED_FEATURES")
+    del estimator.feature_names_in_
+    for calibrated in estimator.calibrated_classifiers_:
+        for _, step in calibrated.estimator.steps:
+            if 'feature_names_in_' in vars(step):
+                del step.feature_names_in_
+
+def coefficient_dtype(estimator):
+    """Dtype of the fallback pipeline's logistic coefficients, float32 if not found"""
+    try:
+        return estimator.calibrated_classifiers_[0].estimator.named_steps['clf'].coef_.dtype.type
+    except (AttributeError, IndexError, KeyError):
+        return np.float32
+
+# Build features in the dtype the loaded model computes in, so inputs reach
+# the ONNX graph (float32) or the sklearn coefficients (float64) without an
+# upcast copy
+FEATURE_DTYPE = np.float32
+
+# Fallback: original scikit-learn estimator, memory-mapped so preloaded
+# workers share its arrays instead of each holding a private copy
+if session is None:
+    try:
+        from joblib import load
+        model = load(MODEL_PATH, mmap_mode='r')
+        drop_feature_names(model)
+        FEATURE_DTYPE = coefficient_dtype(model)
+        print(f"✅ Model loaded from {MODEL_PATH}")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        model = None
 
 try:
-    ranking_df = pd.read_csv(RANKING_PATH)
+    ranking_df = pd.read_csv(RANKING_PATH, usecols=list(RANKING_DTYPES), dtype=RANKING_DTYPES)
+    # Rankings are static: sort once and keep one numpy array per column for /rank
+    ranking_df = ranking_df.sort_values(
+        'habitability_probability', ascending=False, kind='stable'
+    ).reset_index(drop=True)
+    RANK_PROB = ranking_df['habitability_probability'].to_numpy(np.float64)
+    RANK_PROB_NEG = -RANK_PROB  # ascending, for np.searchsorted
+    RANK_NAME = ranking_df['planet_name'].to_numpy(object)
+    RANK_R = ranking_df['rank'].to_numpy(np.int32)
+    RANK_HAB = ranking_df['predicted_habitable'].to_numpy(bool)
+    # Nullable Int32 column as plain int32 values plus a known-year mask
+    RANK_YR = ranking_df['discovery_year'].to_numpy(np.int32, na_value=-1)
+    RANK_YR_KNOWN = ranking_df['discovery_year'].notna().to_numpy()
+    # Every /rank response is a prefix of this list, so build each row's
+    # dict once from native Python values instead of per request
+    RANK_ROWS = [
+        {
+            'rank': rank,
+            'planet_name': name,
+            'habitability_probability': probability,
+            'predicted_habitable': habitable,
+            'disc_year': year if year_known else None
+        }
+        for rank, name, probability, habitable, year, year_known in zip(
+            RANK_R.tolist(), RANK_NAME.tolist(), RANK_PROB.tolist(), RANK_HAB.tolist(),
+            RANK_YR.tolist(), RANK_YR_KNOWN.tolist()
+        )
+    ]
     print(f"✅ Ranking data loaded: {len(ranking_df)} candidates")
 except Exception as e:
     print(f"❌ Error loading ranking data: {e}")
     ranking_df = None
 
+def model_loaded():
+    """True if either the ONNX session or the sklearn fallback is available"""
+    return session is not None or model is not None
+
+def predict_habitability(features):
+    """Return (probabilities, predictions) of the habitable class for each row"""
+    if session is not None:
+        labels, probabilities = session.run(
+            ['label', 'probabilities'],
+            {'input': features}
+        )
+        return probabilities[:, 1], labels
+    return model.predict_proba(features)[:, 1], model.predict(features)
+
+_tls = threading.local()
+
+def feature_buffer():
+    """Per-thread (1, N_FEATURES) row reused by every /predict call on that thread"""
+    buf = getattr(_tls, 'features', None)
+    if buf is None:
+        buf = _tls.features = np.empty((1, N_FEATURES), dtype=FEATURE_DTYPE)
+    return buf
+
+batcher = MicroBatcher(predict_habitability, max_batch=BATCH_MAX_SIZE, window=BATCH_WINDOW_SECONDS)
+
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def json_response(payload, status=200):
+    """orjson-encoded replacement for flask.jsonify"""
+    return Response(orjson.dumps(payload, option=JSON_OPTIONS), status=status, mimetype='application/json')
+
+def serialize(payload):
+    """Encode a payload once for caching; returns (body, etag)"""
+    body = orjson.dumps(payload, option=JSON_OPTIONS)
+    return body, hashlib.sha1(body).hexdigest()
+
+def cached_json_response(body, etag, max_age):
+    """JSON response with ETag/Cache-Control that answers If-None-Match with 304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+@lru_cache(maxsize=RANK_CACHE_SIZE)
+def render_ranking(top_n, threshold):
+    """Serialized /rank body for one (top, threshold) pair over the static ranking"""
+    # Rows are sorted by probability, so matches form a prefix: binary
+    # search its end instead of masking every row. get_ranking has already
+    # rejected NaN, which searchsorted would place after every row.
+    end = min(int(np.searchsorted(RANK_PROB_NEG, -threshold, side='right')), top_n)
+    candidates = RANK_ROWS[:end]
+    
+    return serialize({
+        'status': 'success',
+        'count': len(candidates),
+        'threshold': threshold,
+        'candidates': candidates
+    })
+
+# Constant bodies, encoded once at import
+ROOT_BODY, ROOT_ETAG = serialize({
+    'name': 'ExoHabitAI API',
+    'version': '1.0.0',
+    'endpoints': {
+        '/health': 'GET - Health check',
+        '/predict': 'POST - Single planet prediction',
+        '/rank': 'GET - Get ranked candidates',
+        '/batch_predict': 'POST - Batch predictions (max 100)',
+        '/examples': 'GET - Example payloads'
+    },
+    'documentation': 'https://github.com/CrownDestro/ExoHabitAI-Backend'
+})
+
+EXAMPLES_BODY, EXAMPLES_ETAG = serialize({
+    'examples': [
+        {
+            'planet_name': 'Kepler-442b',
+            'pl_orbper': 112.3,
+            'pl_orbsmax': 0.409,
+            'pl_bmasse': 2.34,
+            'st_met': 0.0,
+            'st_logg': 4.48,
+            'disc_year': 2015,
+            'st_type': 'K',
+            'pl_type': 'super_earth'
+        },
+        {
+            'planet_name': 'Proxima Centauri b',
+            'pl_orbper': 11.2,
+            'pl_orbsmax': 0.0485,
+            'pl_bmasse': 1.27,
+            'st_met': 0.21,
+            'st_logg': 5.2,
+            'disc_year': 2016,
+            'st_type': 'M',
+            'pl_type': 'rocky'
+        }
+    ]
+})
+
 # Root endpoint
 @app.route('/')
 def root():
     """API documentation endpoint"""
-    return jsonify({
-        'name': 'ExoHabitAI API',
-        'version': '1.0.0',
-        'endpoints': {
-            '/health': 'GET - Health check',
-            '/predict': 'POST - Single planet prediction',
-            '/rank': 'GET - Get ranked candidates',
-            '/batch_predict': 'POST - Batch predictions (max 100)',
-            '/examples': 'GET - Example payloads'
-        },
-        'documentation': 'https://github.com/CrownDestro/ExoHabitAI-Backend'
-    })
+    return cached_json_response(ROOT_BODY, ROOT_ETAG, STATIC_MAX_AGE_SECONDS)
 
 # Health check
 @app.route('/health', methods=['GET'])
 def health():
     """Check if API and model are operational"""
-    return jsonify({
-        'status': 'healthy' if model is not None else 'degraded',
-        'model_loaded': model is not None,
+    return json_response({
+        'status': 'healthy' if model_loaded() else 'degraded',
+        'model_loaded': model_loaded(),
         'ranking_loaded': ranking_df is not None
     })
 
@@ -71,17 +285,16 @@ def predict():
         # Validate input
         is_valid, error_msg = validate_input(data)
         if not is_valid:
-            return jsonify({'status': 'error', 'message': error_msg}), 400
+            return json_response({'status': 'error', 'message': error_msg}, 400)
         
-        # Prepare features
-        features = prepare_features(data)
+        # Prepare features in this thread's preallocated row
+        features = fill_features(data, feature_buffer())
         
         # Make prediction
-        if model is None:
-            return jsonify({'status': 'error', 'message': 'Model not loaded'}), 500
+        if not model_loaded():
+            return json_response({'status': 'error', 'message': 'Model not loaded'}, 500)
             
-        probability = model.predict_proba(features)[0][1]
-        prediction = model.predict(features)[0]
+        probability, prediction = batcher.predict(features, timeout=PREDICT_TIMEOUT_SECONDS)
         
         # Format response
         response = format_prediction_response(
@@ -90,13 +303,13 @@ def predict():
             prediction=prediction
         )
         
-        return jsonify(response)
+        return json_response(response)
         
     except Exception as e:
-        return jsonify({
+        return json_response({
             'status': 'error',
             'message': f'Prediction failed: {str(e)}'
-        }), 500
+        }, 500)
 
 # Get rankings
 @app.route('/rank', methods=['GET'])
@@ -104,7 +317,7 @@ def get_ranking():
     """Retrieve pre-computed habitability rankings"""
     try:
         if ranking_df is None:
-            return jsonify({'status': 'error', 'message': 'Ranking data not available'}), 500
+            return json_response({'status': 'error', 'message': 'Ranking data not available'}, 500)
         
         # Get query parameters
         top_n = int(request.args.get('top', 10))
@@ -112,140 +325,138 @@ def get_ranking():
         
         # Validate parameters
         if top_n < 1 or top_n > 100:
-            return jsonify({'status': 'error', 'message': 'top must be between 1 and 100'}), 400
-        if threshold < 0.0 or threshold > 1.0:
-            return jsonify({'status': 'error', 'message': 'threshold must be between 0.0 and 1.0'}), 400
+            return json_response({'status': 'error', 'message': 'top must be between 1 and 100'}, 400)
+        # Written as a range test so NaN fails it too: NaN keys never hit
+        # the render_ranking cache and would only evict real entries
+        if not (0.0 <= threshold <= 1.0):
+            return json_response({'status': 'error', 'message': 'threshold must be between 0.0 and 1.0'}, 400)
+        # -0.0 == 0.0 hashes to the same cache key: canonicalize it so a
+        # threshold=-0 request cannot cache a "-0.0" body for plain /rank
+        threshold += 0.0
         
-        # Filter and get top N
-        filtered = ranking_df[ranking_df['habitability_probability'] >= threshold]
-        top_candidates = filtered.head(top_n)
-        
-        # Format response
-        candidates = []
-        for _, row in top_candidates.iterrows():
-            candidates.append({
-                'rank': int(row['rank']),
-                'planet_name': row['planet_name'],
-                'habitability_probability': float(row['habitability_probability']),
-                'predicted_habitable': bool(row['predicted_habitable']),
-                'disc_year': int(row['discovery_year']) if pd.notna(row['discovery_year']) else None
-            })
-        
-        return jsonify({
-            'status': 'success',
-            'count': len(candidates),
-            'threshold': threshold,
-            'candidates': candidates
-        })
+        body, etag = render_ranking(top_n, threshold)
+        return cached_json_response(body, etag, RANK_MAX_AGE_SECONDS)
         
     except Exception as e:
-        return jsonify({
+        return json_response({
             'status': 'error',
             'message': f'Failed to retrieve rankings: {str(e)}'
-        }), 500
+        }, 500)
 
 # Batch prediction
 @app.route('/batch_predict', methods=['POST'])
 def batch_predict():
-    """Predict habitability for multiple exoplanets"""
+    """Predict habitability for multiple exoplanets (JSON or Arrow IPC stream)"""
     try:
-        data = request.get_json()
-        planets = data.get('planets', [])
-        
-        if not planets:
-            return jsonify({'status': 'error', 'message': 'No planets provided'}), 400
-        
-        if len(planets) > 100:
-            return jsonify({'status': 'error', 'message': 'Maximum 100 planets per batch'}), 400
-        
-        results = []
-        failed = []
-        
-        for planet in planets:
-            try:
-                # Validate
-                is_valid, error_msg = validate_input(planet)
-                if not is_valid:
-                    failed.append({
-                        'planet_name': planet.get('planet_name', 'Unknown'),
-                        'error': error_msg
-                    })
-                    continue
-                
-                # Predict
-                features = prepare_features(planet)
-                probability = model.predict_proba(features)[0][1]
-                prediction = model.predict(features)[0]
-                
-                response = format_prediction_response(
-                    planet_name=planet.get('planet_name', 'Unknown'),
-                    probability=probability,
-                    prediction=prediction
-                )
-                results.append(response)
-                
-            except Exception as e:
-                failed.append({
-                    'planet_name': planet.get('planet_name', 'Unknown'),
-                    'error': str(e)
-                })
-        
-        return jsonify({
-            'status': 'success',
-            'total': len(planets),
-            'successful': len(results),
-            'failed': len(failed),
-            'results': results,
-            'errors': failed if failed else None
-        })
+        arrow_input = request.mimetype == ARROW_STREAM_MIMETYPE
+        arrow_output = request.accept_mimetypes.best_match(
+            ['application/json', ARROW_STREAM_MIMETYPE]
+        ) == ARROW_STREAM_MIMETYPE
+        
+        if arrow_input and pa is None:
+            return json_response({'status': 'error', 'message': 'Arrow payloads require pyarrow'}, 415)
+        if arrow_output and pa is None:
+            # Answer in JSON if the client takes it at all; otherwise 406
+            if not request.accept_mimetypes['application/json']:
+                return json_response({'status': 'error', 'message': 'Arrow responses require pyarrow'}, 406)
+            arrow_output = False
+        
+        if arrow_input:
+            planets = ipc.open_stream(request.get_data()).read_all()
+            n = planets.num_rows
+        else:
+            data = request.get_json()
+            planets = data.get('planets', [])
+            n = len(planets)
+        
+        if not n:
+            return json_response({'status': 'error', 'message': 'No planets provided'}, 400)
+        
+        if n > 100:
+            return json_response({'status': 'error', 'message': 'Maximum 100 planets per batch'}, 400)
+        
+        # Pass 1: per-planet state as parallel arrays, indexed by input position
+        if arrow_input:
+            names, errors, ok, X = prepare_table_features(planets, dtype=FEATURE_DTYPE)
+        else:
+            names, errors, ok, X = prepare_batch_features(planets, dtype=FEATURE_DTYPE)
+        
+        if arrow_output:
+            return arrow_batch_response(names, errors, ok, X)
+        
+        valid = np.flatnonzero(ok)
+        failed = [
+            {'planet_name': names[i], 'error': errors[i]}
+            for i in np.flatnonzero(~ok)
+        ]
+        
+        # Pass 2: one vectorized model call over every valid planet, made
+        # before streaming starts so a model error returns a 500 instead of
+        # a truncated 200 body. Only encoding is streamed, chunk by chunk.
+        probabilities, predictions = predict_habitability(X[valid]) if len(valid) else ((), ())
+        
+        def stream():
+            yield b'{"status":"success","total":%d,"successful":%d,"failed":%d,"results":[' % (
+                n, len(valid), len(failed)
+            )
+            for start in range(0, len(valid), BATCH_STREAM_CHUNK):
+                stop = start + BATCH_STREAM_CHUNK
+                rows = [
+                    orjson.dumps(format_prediction_response(
+                        planet_name=names[i],
+                        probability=probability,
+                        prediction=prediction
+                    ), option=JSON_OPTIONS)
+                    for i, probability, prediction in zip(
+                        valid[start:stop], probabilities[start:stop], predictions[start:stop]
+                    )
+                ]
+                yield (b',' if start else b'') + b','.join(rows)
+            yield b'],"errors":' + orjson.dumps(failed if failed else None, option=JSON_OPTIONS) + b'}'
+        
+        return Response(stream(), mimetype='application/json')
         
     except Exception as e:
-        return jsonify({
+        return json_response({
             'status': 'error',
             'message': f'Batch prediction failed: {str(e)}'
-        }), 500
+        }, 500)
+
+def arrow_batch_response(names, errors, ok, X):
+    """One Arrow row per input planet: planet_name, probability, is_habitable, error"""
+    probabilities = np.zeros(len(names), dtype=np.float64)
+    predictions = np.zeros(len(names), dtype=bool)
+    if ok.any():
+        probabilities[ok], predictions[ok] = predict_habitability(X[ok])
+    
+    table = pa.table({
+        'planet_name': pa.array([None if name is None else str(name) for name in names], type=pa.string()),
+        'probability': pa.array(probabilities, mask=~ok),
+        'is_habitable': pa.array(predictions, mask=~ok),
+        'error': pa.array(errors, type=pa.string())
+    })
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), mimetype=ARROW_STREAM_MIMETYPE)
 
 # Example payloads
 @app.route('/examples', methods=['GET'])
 def examples():
     """Get example input payloads"""
-    return jsonify({
-        'examples': [
-            {
-                'planet_name': 'Kepler-442b',
-                'pl_orbper': 112.3,
-                'pl_orbsmax': 0.409,
-                'pl_bmasse': 2.34,
-                'st_met': 0.0,
-                'st_logg': 4.48,
-                'disc_year': 2015,
-                'st_type': 'K',
-                'pl_type': 'super_earth'
-            },
-            {
-                'planet_name': 'Proxima Centauri b',
-                'pl_orbper': 11.2,
-                'pl_orbsmax': 0.0485,
-                'pl_bmasse': 1.27,
-                'st_met': 0.21,
-                'st_logg': 5.2,
-                'disc_year': 2016,
-                'st_type': 'M',
-                'pl_type': 'rocky'
-            }
-        ]
-    })
+    return cached_json_response(EXAMPLES_BODY, EXAMPLES_ETAG, STATIC_MAX_AGE_SECONDS)
 
 # Error handlers
 @app.errorhandler(404)
 def not_found(e):
-    return jsonify({'status': 'error', 'message': 'Endpoint not found'}), 404
+    return json_response({'status': 'error', 'message': 'Endpoint not found'}, 404)
 
 @app.errorhandler(500)
 def internal_error(e):
-    return jsonify({'status': 'error', 'message': 'Internal server error'}), 500
+    return json_response({'status': 'error', 'message': 'Internal server error'}, 500)
 
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn (see Procfile)
     # Get port from environment variable (Render sets this)
     port = int(os.environ.get('PORT', 5000))
     # Bind to 0.0.0.0 to allow external connections
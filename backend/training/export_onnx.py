@@ -0,0 +1,168 @@
+"""
+ExoHabitAI - ONNX Export
+Converts the trained scikit-learn model into an ONNX graph for serving.
+
+The API loads models/model.onnx with onnxruntime, which avoids unpickling
+the estimator at worker start-up and runs predict_proba as a single
+optimized graph instead of nested sklearn Python calls.
+
+The graph is assembled directly with onnx.helper: skl2onnx's converter for
+CalibratedClassifierCV does not reproduce sigmoid calibration on top of
+decision_function for this model, so each calibrated fold is written out as
+
+    p_k = sigmoid(-(a_k * (((x - mean_k) / scale_k) . coef_k + b0_k) + b_k))
+
+and probabilities are averaged across folds, exactly as sklearn does.
+
+Usage (from the repository root):
+    python backend/training/export_onnx.py
+"""
+
+import hashlib
+from pathlib import Path
+
+import joblib
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+MODEL_DIR = Path("models")
+MODEL_PATH = MODEL_DIR / "final_model_scientific.joblib"
+ONNX_PATH = MODEL_DIR / "model.onnx"
+
+# Input/output names the API binds to in app.py
+INPUT_NAME = "input"
+LABEL_NAME = "label"
+PROBA_NAME = "probabilities"
+
+OPSET = 17
+
+# Metadata key holding the SHA-256 of the source model file; app.py
+# refuses an ONNX export whose source no longer matches MODEL_PATH
+SOURCE_HASH_KEY = "source_sha256"
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_folds(model):
+    """Collect per-fold scaler, logistic and calibration parameters as arrays."""
+    if model.method != 'sigmoid':
+        raise ValueError(f"Unsupported calibration method: {model.method}")
+
+    params = {'mean': [], 'scale': [], 'coef': [], 'intercept': [], 'a': [], 'b': []}
+    for calibrated in model.calibrated_classifiers_:
+        scaler = calibrated.estimator.named_steps['scaler']
+        clf = calibrated.estimator.named_steps['clf']
+        calibrator = calibrated.calibrators[0]
+
+        params['mean'].append(scaler.mean_)
+        params['scale'].append(scaler.scale_)
+        params['coef'].append(clf.coef_[0])
+        params['intercept'].append(clf.intercept_[0])
+        params['a'].append(calibrator.a_)
+        params['b'].append(calibrator.b_)
+
+    return {name: np.asarray(values, dtype=np.float32) for name, values in params.items()}
+
+
+def build_graph(model):
+    """Build an ONNX model computing [P(not habitable), P(habitable)] and the label."""
+    n_features = model.n_features_in_
+    folds = extract_folds(model)
+    n_folds = len(folds['a'])
+
+    initializers = [
+        numpy_helper.from_array(folds['mean'], 'fold_mean'),
+        numpy_helper.from_array(folds['scale'], 'fold_scale'),
+        numpy_helper.from_array(folds['coef'], 'fold_coef'),
+        numpy_helper.from_array(folds['intercept'], 'fold_intercept'),
+        numpy_helper.from_array(folds['a'], 'calib_a'),
+        numpy_helper.from_array(folds['b'], 'calib_b'),
+        numpy_helper.from_array(np.full((n_folds, 1), 1.0 / n_folds, dtype=np.float32), 'fold_weight'),
+        numpy_helper.from_array(np.array([1], dtype=np.int64), 'axis_one'),
+        numpy_helper.from_array(np.array([2], dtype=np.int64), 'axis_two'),
+        numpy_helper.from_array(np.array(1.0, dtype=np.float32), 'one'),
+        numpy_helper.from_array(np.array(0.5, dtype=np.float32), 'half'),
+    ]
+
+    nodes = [
+        # (N, 15) -> (N, 1, 15) so every fold's scaler broadcasts to (N, folds, 15)
+        helper.make_node('Unsqueeze', [INPUT_NAME, 'axis_one'], ['x_folds']),
+        helper.make_node('Sub', ['x_folds', 'fold_mean'], ['x_centered']),
+        helper.make_node('Div', ['x_centered', 'fold_scale'], ['x_scaled']),
+        helper.make_node('Mul', ['x_scaled', 'fold_coef'], ['weighted']),
+        helper.make_node('ReduceSum', ['weighted', 'axis_two'], ['dot'], keepdims=0),
+        helper.make_node('Add', ['dot', 'fold_intercept'], ['decision']),
+        # Platt scaling: sigmoid(-(a * decision + b))
+        helper.make_node('Mul', ['decision', 'calib_a'], ['calib_scaled']),
+        helper.make_node('Add', ['calib_scaled', 'calib_b'], ['calib_logit']),
+        helper.make_node('Neg', ['calib_logit'], ['neg_logit']),
+        helper.make_node('Sigmoid', ['neg_logit'], ['fold_proba']),
+        # Average folds -> (N, 1)
+        helper.make_node('MatMul', ['fold_proba', 'fold_weight'], ['proba_pos']),
+        helper.make_node('Sub', ['one', 'proba_pos'], ['proba_neg']),
+        helper.make_node('Concat', ['proba_neg', 'proba_pos'], [PROBA_NAME], axis=1),
+        helper.make_node('Greater', ['proba_pos', 'half'], ['is_pos']),
+        helper.make_node('Squeeze', ['is_pos', 'axis_one'], ['is_pos_flat']),
+        helper.make_node('Cast', ['is_pos_flat'], [LABEL_NAME], to=TensorProto.INT64),
+    ]
+
+    graph = helper.make_graph(
+        nodes,
+        'exohabitai_calibrated_logistic',
+        inputs=[helper.make_tensor_value_info(INPUT_NAME, TensorProto.FLOAT, [None, n_features])],
+        outputs=[
+            helper.make_tensor_value_info(LABEL_NAME, TensorProto.INT64, [None]),
+            helper.make_tensor_value_info(PROBA_NAME, TensorProto.FLOAT, [None, 2]),
+        ],
+        initializer=initializers,
+    )
+
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', OPSET)])
+    onnx_model.ir_version = 8
+    onnx.checker.check_model(onnx_model)
+    return onnx_model
+
+
+def export_onnx(model_path=MODEL_PATH, onnx_path=ONNX_PATH):
+    """Convert the saved sklearn model to ONNX with a (None, n_features) input."""
+    model = joblib.load(model_path)
+
+    onnx_model = build_graph(model)
+    helper.set_model_props(onnx_model, {SOURCE_HASH_KEY: file_sha256(model_path)})
+    with open(onnx_path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+
+    print(f"✓ Saved: {onnx_path} ({model.n_features_in_} features)")
+    return onnx_path
+
+
+def verify_export(model_path=MODEL_PATH, onnx_path=ONNX_PATH,
+                  data_path="data/processed/exoplanet_tess_processed.csv"):
+    """Compare ONNX outputs against the sklearn model on the processed dataset."""
+    import onnxruntime as ort
+    import pandas as pd
+
+    model = joblib.load(model_path)
+
+    X = pd.read_csv(data_path)[list(model.feature_names_in_)].astype(float)
+    X = X.fillna(X.median())
+
+    expected = model.predict_proba(X)[:, 1]
+    sess = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+    labels, proba = sess.run([LABEL_NAME, PROBA_NAME], {INPUT_NAME: X.to_numpy(np.float32)})
+
+    max_diff = float(np.max(np.abs(expected - proba[:, 1])))
+    label_mismatches = int(np.sum(labels != model.predict(X)))
+    print(f"✓ Verified on {len(X)} planets: max probability difference = {max_diff:.2e}, "
+          f"label mismatches = {label_mismatches}")
+    return max_diff
+
+
+if __name__ == "__main__":
+    export_onnx()
+    verify_export()
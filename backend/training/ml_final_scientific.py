@@ -716,12 +716,11 @@ def main():
             final_model, X, y, groups, df_clean, model_name, eval_metrics, excluded_features
         )
         
-        # Save final model with pickle protocol 4 for compatibility
-        model_file = MODEL_DIR / 'final_model_scientific.pkl'
-        import pickle
-        with open(model_file, 'wb') as f:
-            pickle.dump(final_model, f, protocol=4)
-        print(f"\n✓ Saved: {model_file} (pickle protocol 4)")
+        # Save final model uncompressed with pickle protocol 5 so the API can
+        # memory-map its arrays (joblib.load(..., mmap_mode='r'))
+        model_file = MODEL_DIR / 'final_model_scientific.joblib'
+        joblib.dump(final_model, model_file, protocol=5, compress=0)
+        print(f"\n✓ Saved: {model_file} (pickle protocol 5, uncompressed)")
         
         # Execution summary
         end_time = datetime.now()
@@ -742,7 +741,7 @@ def main():
         print(f"   {OUTPUT_DIR / 'final_model_evaluation.png'}")
         print(f"   {OUTPUT_DIR / 'feature_importance.png'}")
         print(f"   {OUTPUT_DIR / 'model_metadata_final.json'}")
-        print(f"   {MODEL_DIR / 'final_model_scientific.pkl'}")
+        print(f"   {MODEL_DIR / 'final_model_scientific.joblib'}")
         
         print("\n" + "="*80)
         print("✅ ALL TASKS COMPLETED SUCCESSFULLY")
@@ -0,0 +1,90 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one model call.
+
+    Callers submit a (1, n_features) row and receive a Future resolving to
+    (probability, prediction). A background thread drains the queue: a lone
+    request is run immediately, while under concurrent load the batch keeps
+    collecting rows until `window` seconds pass or `max_batch` is reached.
+
+    The worker is started lazily (and restarted after fork), so the batcher
+    can be created at import time in a gunicorn --preload master.
+    """
+
+    def __init__(self, predict_fn: Callable, max_batch: int = 64, window: float = 0.005):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.window = window
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+    def submit(self, features) -> Future:
+        fut = Future()
+        self._ensure_worker()
+        self._queue.put((features, fut))
+        return fut
+
+    def predict(self, features, timeout: float = None) -> Tuple[float, int]:
+        return self.submit(features).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(
+                    target=self._run, args=(self._queue,),
+                    name='predict-batcher', daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self, q: queue.Queue) -> list:
+        items = [q.get()]
+
+        # Take whatever is already waiting without blocking
+        while len(items) < self.max_batch:
+            try:
+                items.append(q.get_nowait())
+            except queue.Empty:
+                break
+
+        # Only hold the batch open when other requests are in flight
+        if len(items) > 1:
+            deadline = time.monotonic() + self.window
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+        return items
+
+    def _run(self, q: queue.Queue):
+        while True:
+            items = self._collect(q)
+            futures = [fut for _, fut in items]
+            try:
+                X = np.vstack([features for features, _ in items])
+                probabilities, predictions = self.predict_fn(X)
+                for fut, probability, prediction in zip(futures, probabilities, predictions):
+                    fut.set_result((probability, prediction))
+            except Exception as e:
+                for fut in futures:
+                    if not fut.done():
+                        fut.set_exception(e)
@@ -3,7 +3,7 @@ import joblib
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent
-model_path = project_root / "models" / "final_model_scientific.pkl"
+model_path = project_root / "models" / "final_model_scientific.joblib"
 data_path = project_root / "data" / "processed" / "exoplanet_tess_processed.csv"
 output_path = project_root / "data" / "processed" / "habitability_ranking_final.csv"
 output_path.parent.mkdir(parents=True, exist_ok=True)
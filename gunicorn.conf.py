@@ -0,0 +1,15 @@
+# gunicorn.conf.py - Production server settings
+# Usage: gunicorn --config gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One process per core; threads overlap request I/O within each worker
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import app.py (model + ranking data) once in the master and fork workers
+# from it, so the loaded model and ranking arrays are shared copy-on-write
+preload_app = True
@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import app as api
+from app import ARROW_STREAM_MIMETYPE, app
+from utils import FEATURE_INDEX
+
+KEPLER_442B = {
+    'planet_name': 'Kepler-442b',
+    'pl_orbper': 112.3,
+    'pl_orbsmax': 0.409,
+    'pl_bmasse': 2.34,
+    'st_met': 0.0,
+    'st_logg': 4.48,
+    'disc_year': 2015,
+    'st_type': 'K',
+    'pl_type': 'super_earth'
+}
+
+def planet(**changes):
+    """Kepler-442b with `changes` applied; a value of None drops that key"""
+    data = dict(KEPLER_442B, **changes)
+    return {key: value for key, value in data.items() if value is not None}
+
+def arrow_stream(planets):
+    """Arrow IPC stream of `planets`, built the way the README client does"""
+    table = pa.Table.from_pylist(planets)
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class BatchPredictParityTest(unittest.TestCase):
+    """The same planets sent as JSON and as Arrow get the same /batch_predict result"""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def assert_same_result(self, planets):
+        json_response = self.client.post('/batch_predict', json={'planets': planets})
+        arrow_response = self.client.post(
+            '/batch_predict', data=arrow_stream(planets),
+            headers={'Content-Type': ARROW_STREAM_MIMETYPE}
+        )
+        self.assertEqual(json_response.status_code, 200)
+        self.assertEqual(arrow_response.status_code, 200)
+        self.assertEqual(arrow_response.get_json(), json_response.get_json())
+        return json_response.get_json()
+
+    def test_valid_planets(self):
+        result = self.assert_same_result([
+            KEPLER_442B,
+            planet(planet_name='Proxima Centauri b', pl_orbper=11.2, pl_orbsmax=0.0485,
+                   pl_bmasse=1.27, st_met=0.21, st_logg=5.2, disc_year=2016, st_type='M', pl_type='rocky'),
+        ])
+        self.assertEqual(result['successful'], 2)
+
+    def test_missing_planet_name(self):
+        result = self.assert_same_result([KEPLER_442B, planet(planet_name=None)])
+        self.assertEqual([r['planet_name'] for r in result['results']], ['Kepler-442b', 'Unknown'])
+
+    def test_rejected_planets(self):
+        result = self.assert_same_result([
+            KEPLER_442B,
+            planet(planet_name='Too heavy', pl_bmasse=20000.0),
+            planet(planet_name='No metallicity', st_met=None),
+            planet(planet_name='Unknown star', st_type='O'),
+            planet(planet_name=None, pl_type='ice_giant'),
+        ])
+        self.assertEqual(result['successful'], 1)
+        self.assertEqual(result['failed'], 4)
+
+    def test_missing_column(self):
+        result = self.assert_same_result([planet(pl_type=None), planet(planet_name='Kepler-442c', pl_type=None)])
+        self.assertEqual(result['failed'], 2)
+
+    def test_arrow_response_matches_json(self):
+        planets = [KEPLER_442B, planet(planet_name=None, st_logg=7.0)]
+        expected = self.client.post('/batch_predict', json={'planets': planets}).get_json()
+        response = self.client.post(
+            '/batch_predict', data=arrow_stream(planets),
+            headers={'Content-Type': ARROW_STREAM_MIMETYPE, 'Accept': ARROW_STREAM_MIMETYPE}
+        )
+        table = ipc.open_stream(response.data).read_all().to_pylist()
+
+        self.assertEqual([row['planet_name'] for row in table], ['Kepler-442b', 'Unknown'])
+        self.assertEqual(round(table[0]['probability'], 4),
+                         expected['results'][0]['habitability_prediction']['probability'])
+        self.assertEqual(table[1]['error'], expected['errors'][0]['error'])
+
+
+class BatchPredictStreamTest(unittest.TestCase):
+    """A model failure anywhere in the batch is reported before the streamed 200 starts"""
+
+    def test_model_error_after_first_chunk(self):
+        planets = [planet(planet_name=f'Kepler-442b-{i}') for i in range(2 * api.BATCH_STREAM_CHUNK)]
+        planets[-1] = planet(planet_name='Model breaker', pl_bmasse=3.0)
+        predict = api.predict_habitability
+
+        def fail_on_model_breaker(features):
+            if (features[:, FEATURE_INDEX['pl_bmasse']] == 3.0).any():
+                raise RuntimeError('model failed')
+            return predict(features)
+
+        with mock.patch.object(api, 'predict_habitability', side_effect=fail_on_model_breaker):
+            response = app.test_client().post('/batch_predict', json={'planets': planets})
+            body = response.get_json()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body['status'], 'error')
+
+
+if __name__ == '__main__':
+    unittest.main()
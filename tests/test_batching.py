@@ -0,0 +1,94 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from batching import MicroBatcher
+
+N_FEATURES = 3
+
+def score(X):
+    """Stand-in model: (row sum, row sum > 1) for each row"""
+    totals = X.sum(axis=1)
+    return totals, (totals > 1.0).astype(np.int64)
+
+def rows(n, seed=0):
+    """n (1, N_FEATURES) rows as MicroBatcher.submit takes them"""
+    return list(np.random.default_rng(seed).random((n, 1, N_FEATURES)))
+
+
+class GatedModel:
+    """Holds its first call until released, so later submits queue up into one batch"""
+
+    def __init__(self, predict_fn):
+        self.predict_fn = predict_fn
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batch_sizes = []
+
+    def __call__(self, X):
+        if not self.started.is_set():
+            self.started.set()
+            self.release.wait(timeout=5)
+        self.batch_sizes.append(len(X))
+        return self.predict_fn(X)
+
+
+class MicroBatcherTest(unittest.TestCase):
+
+    def test_concurrent_submits_match_direct_calls(self):
+        batcher = MicroBatcher(score, max_batch=16, window=0.005)
+        features = rows(200)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda row: batcher.predict(row, timeout=5), features))
+
+        for row, (probability, prediction) in zip(features, results):
+            expected_probability, expected_prediction = score(row)
+            self.assertEqual(probability, expected_probability[0])
+            self.assertEqual(prediction, expected_prediction[0])
+
+    def test_queued_rows_are_batched(self):
+        model = GatedModel(score)
+        batcher = MicroBatcher(model, max_batch=8, window=0.005)
+        features = rows(21)
+
+        first = batcher.submit(features[0])
+        self.assertTrue(model.started.wait(timeout=5))
+        queued = [batcher.submit(row) for row in features[1:]]
+        model.release.set()
+
+        results = [first.result(timeout=5)] + [fut.result(timeout=5) for fut in queued]
+        self.assertEqual(model.batch_sizes, [1, 8, 8, 4])
+        for row, (probability, prediction) in zip(features, results):
+            self.assertEqual((probability, prediction), tuple(value[0] for value in score(row)))
+
+    def test_exception_reaches_every_future_in_the_batch(self):
+        def fail_on_negative(X):
+            if (X < 0).any():
+                raise ValueError('negative feature')
+            return score(X)
+
+        model = GatedModel(fail_on_negative)
+        batcher = MicroBatcher(model, max_batch=64, window=0.005)
+        features = rows(6)
+        features[3] = -features[3]
+
+        first = batcher.submit(features[0])
+        self.assertTrue(model.started.wait(timeout=5))
+        queued = [batcher.submit(row) for row in features[1:]]
+        model.release.set()
+
+        self.assertEqual(first.result(timeout=5), tuple(value[0] for value in score(features[0])))
+        for fut in queued:
+            with self.assertRaisesRegex(ValueError, 'negative feature'):
+                fut.result(timeout=5)
+        self.assertEqual(model.batch_sizes, [1, 5])
+
+        # The worker survives a failed batch
+        self.assertEqual(batcher.predict(features[1], timeout=5), tuple(value[0] for value in score(features[1])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,6 +20,10 @@ EXPECTED_FEATURES = [
     'pl_type_category_super_earth'
 ]
 
+N_FEATURES = len(EXPECTED_FEATURES)
+FEATURE_INDEX = {feat: i for i, feat in enumerate(EXPECTED_FEATURES)}
+NUMERICAL_FEATURES = ['pl_orbper', 'pl_orbsmax', 'pl_bmasse', 'st_met', 'st_logg', 'disc_year']
+
 VALIDATION_RANGES = {
     'pl_orbper': (0.1, 100000.0),      # Orbital period (days)
     'pl_orbsmax': (0.001, 1000.0),     # Semi-major axis (AU)
@@ -32,11 +36,14 @@ VALIDATION_RANGES = {
 VALID_STELLAR_TYPES = ['F', 'G', 'K', 'M', 'Other']
 VALID_PLANET_TYPES = ['jupiter', 'neptune', 'rocky', 'super_earth']
 
+# (feature, min, max) for every required numerical parameter, resolved once
+# so validate_input is a single pass without per-call dict lookups
+NUMERICAL_RULES = tuple(
+    (feature, *VALIDATION_RANGES[feature]) for feature in NUMERICAL_FEATURES
+)
+
 def validate_input(data: Dict) -> Tuple[bool, str]:
-    required_numerical = ['pl_orbper', 'pl_orbsmax', 'pl_bmasse', 
-                          'st_met', 'st_logg', 'disc_year']
-    
-    for feature in required_numerical:
+    for feature, min_val, max_val in NUMERICAL_RULES:
         if feature not in data:
             return False, f"Missing required parameter: {feature}"
         
@@ -45,10 +52,8 @@ def validate_input(data: Dict) -> Tuple[bool, str]:
         except (ValueError, TypeError):
             return False, f"Parameter '{feature}' must be numeric, got: {data[feature]}"
         
-        if feature in VALIDATION_RANGES:
-            min_val, max_val = VALIDATION_RANGES[feature]
-            if not (min_val <= value <= max_val):
-                return False, f"Parameter '{feature}' must be between {min_val} and {max_val}, got: {value}"
+        if not (min_val <= value <= max_val):
+            return False, f"Parameter '{feature}' must be between {min_val} and {max_val}, got: {value}"
     
     if 'st_type' not in data:
         return False, "Missing required parameter: st_type"
@@ -64,24 +69,116 @@ def validate_input(data: Dict) -> Tuple[bool, str]:
     
     return True, "Valid"
 
-def prepare_features(data: Dict) -> pd.DataFrame:
-    features = {feat: 0.0 for feat in EXPECTED_FEATURES}
+def prepare_features(data: Dict, dtype=np.float32) -> np.ndarray:
+    """Return the (1, N_FEATURES) feature row for `data`, columns in EXPECTED_FEATURES order."""
+    return fill_features(data, np.empty((1, N_FEATURES), dtype=dtype))
+
+def fill_features(data: Dict, out: np.ndarray) -> np.ndarray:
+    """Write the feature row for `data` into `out` (shape (1, N_FEATURES)) in place."""
+    row = out[0]
+    row[:] = 0.0
+    
+    for feature in NUMERICAL_FEATURES:
+        row[FEATURE_INDEX[feature]] = float(data[feature])
+    
+    row[FEATURE_INDEX[f"st_type_category_{data['st_type']}"]] = 1.0
+    row[FEATURE_INDEX[f"pl_type_category_{data['pl_type']}"]] = 1.0
+    
+    return out
+
+def prepare_batch_features(planets: List[Dict], dtype=np.float32) -> Tuple[List, List, np.ndarray, np.ndarray]:
+    """Validate a list of planet dicts.
     
-    features['pl_orbper'] = float(data['pl_orbper'])
-    features['pl_orbsmax'] = float(data['pl_orbsmax'])
-    features['pl_bmasse'] = float(data['pl_bmasse'])
-    features['st_met'] = float(data['st_met'])
-    features['st_logg'] = float(data['st_logg'])
-    features['disc_year'] = float(data['disc_year'])
+    Returns index-aligned (names, errors, ok, X): display names, the error
+    message for each rejected planet (None otherwise), a bool mask of valid
+    planets and the (N, N_FEATURES) feature matrix of `dtype` (valid rows only).
+    """
+    n = len(planets)
+    names = [planet.get('planet_name', 'Unknown') for planet in planets]
+    errors = [None] * n
+    ok = np.zeros(n, dtype=bool)
+    X = np.empty((n, N_FEATURES), dtype=dtype)
     
-    st_type = data['st_type']
-    features[f'st_type_category_{st_type}'] = 1.0
+    for i, planet in enumerate(planets):
+        try:
+            is_valid, error_msg = validate_input(planet)
+            if not is_valid:
+                errors[i] = error_msg
+                continue
+            
+            fill_features(planet, X[i:i + 1])
+            ok[i] = True
+            
+        except Exception as e:
+            errors[i] = str(e)
     
-    pl_type = data['pl_type']
-    features[f'pl_type_category_{pl_type}'] = 1.0
+    return names, errors, ok, X
+
+def _table_column(table, name: str, dtype):
+    """Column `name` of a pyarrow Table as a numpy array, or None if absent/unconvertible."""
+    if name not in table.column_names:
+        return None
+    try:
+        return table.column(name).to_numpy(zero_copy_only=False).astype(dtype)
+    except (TypeError, ValueError, NotImplementedError):
+        return None
+
+def prepare_table_features(table, dtype=np.float32) -> Tuple[List, List, np.ndarray, np.ndarray]:
+    """Validate a pyarrow Table with one row per planet; same result as prepare_batch_features.
+    
+    Columns are range-checked and one-hot encoded as whole arrays. Rows that
+    do not pass (nulls, out-of-range or unknown values, missing or
+    non-numeric columns) go through validate_input one at a time, so
+    accepted inputs and error messages match the JSON path.
+    
+    pa.Table.from_pylist stores a key missing from a planet as null, so a
+    null is read as that key being absent: a null planet_name becomes
+    'Unknown' and a null parameter is reported as missing.
+    """
+    n = table.num_rows
+    if 'planet_name' in table.column_names:
+        names = ['Unknown' if name is None else name for name in table.column('planet_name').to_pylist()]
+    else:
+        names = ['Unknown'] * n
+    errors = [None] * n
+    X = np.zeros((n, N_FEATURES), dtype=dtype)
+    ok = np.ones(n, dtype=bool)
+    
+    for feature, min_val, max_val in NUMERICAL_RULES:
+        values = _table_column(table, feature, np.float64)
+        if values is None:
+            ok[:] = False
+            continue
+        ok &= (values >= min_val) & (values <= max_val)
+        X[:, FEATURE_INDEX[feature]] = values
+    
+    for column, valid_types in (('st_type', VALID_STELLAR_TYPES), ('pl_type', VALID_PLANET_TYPES)):
+        values = _table_column(table, column, object)
+        if values is None:
+            ok[:] = False
+            continue
+        known = np.zeros(n, dtype=bool)
+        for value in valid_types:
+            match = values == value
+            X[match, FEATURE_INDEX[f'{column}_category_{value}']] = 1.0
+            known |= match
+        ok &= known
+    
+    for i in np.flatnonzero(~ok):
+        planet = {key: value for key, value in table.slice(i, 1).to_pylist()[0].items() if value is not None}
+        try:
+            is_valid, error_msg = validate_input(planet)
+            if not is_valid:
+                errors[i] = error_msg
+                continue
+            
+            fill_features(planet, X[i:i + 1])
+            ok[i] = True
+            
+        except Exception as e:
+            errors[i] = str(e)
     
-    df = pd.DataFrame([features])
-    return df
+    return names, errors, ok, X
 
 def format_prediction_response(planet_name: str, probability: float, 
                                prediction: int) -> Dict: